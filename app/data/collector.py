@@ -1,6 +1,7 @@
-import json
+import orjson
+import aiofiles
 from datetime import datetime, timedelta
-import random
+import numpy as np
 from typing import List, Dict, Any
 import logging
 import os
@@ -12,6 +13,9 @@ class SocialMediaDataCollector:
     def __init__(self):
         self.platforms = ["Instagram", "Facebook", "X"]
         self.sentiment_options = ["positive", "negative", "neutral"]
+        self._platforms_arr = np.array(self.platforms)
+        self._sentiments_arr = np.array(self.sentiment_options)
+        self._rng = np.random.default_rng()
         
     def generate_simulated_data(self, brand_name: str, days: int = 30) -> List[Dict[str, Any]]:
         """
@@ -26,35 +30,58 @@ class SocialMediaDataCollector:
         """
         logger.debug(f"Generating simulated data for brand: {brand_name}")
         
-        data = []
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        current_date = start_date
-        while current_date <= end_date:
-            # Generate 1-5 posts per day
-            posts_per_day = random.randint(1, 5)
-            
-            for _ in range(posts_per_day):
-                post = {
-                    "platform": random.choice(self.platforms),
-                    "date": current_date.strftime("%Y-%m-%d %H:%M:%S"),
-                    "content": f"Sample post about {brand_name}",
-                    "engagement": {
-                        "likes": random.randint(100, 10000),
-                        "comments": random.randint(10, 500),
-                        "shares": random.randint(5, 200)
-                    },
-                    "sentiment": random.choice(self.sentiment_options),
-                    "url": f"https://example.com/{brand_name.lower().replace(' ', '-')}/{random.randint(1000, 9999)}"
-                }
-                data.append(post)
-            
-            current_date += timedelta(days=1)
+        # Generate 1-5 posts per day, then draw every field for all posts at once
+        posts_per_day = self._rng.integers(1, 6, size=days + 1)
+        n = int(posts_per_day.sum())
+        
+        day_stamps = [
+            (start_date + timedelta(days=i)).strftime("%Y-%m-%d %H:%M:%S")
+            for i in range(days + 1)
+        ]
+        dates = np.repeat(day_stamps, posts_per_day).tolist()
+        platforms = self._rng.choice(self._platforms_arr, n).tolist()
+        sentiments = self._rng.choice(self._sentiments_arr, n).tolist()
+        likes = self._rng.integers(100, 10001, n).tolist()
+        comments = self._rng.integers(10, 501, n).tolist()
+        shares = self._rng.integers(5, 201, n).tolist()
+        ids = self._rng.integers(1000, 10000, n).tolist()
+        
+        content = f"Sample post about {brand_name}"
+        slug = brand_name.lower().replace(' ', '-')
+        urls = [f"https://example.com/{slug}/{post_id}" for post_id in ids]
+        
+        data = [
+            {
+                "platform": platforms[i],
+                "date": dates[i],
+                "content": content,
+                "likes": likes[i],
+                "comments": comments[i],
+                "shares": shares[i],
+                "sentiment": sentiments[i],
+                "url": urls[i]
+            }
+            for i in range(n)
+        ]
         
         return data
     
-    def save_data_to_json(self, data: List[Dict[str, Any]], filename: str) -> None:
+    def data_filename(self, brand_name: str) -> str:
+        """
+        Build the name of the JSON file that holds a brand's collected data.
+        
+        Args:
+            brand_name (str): Name of the brand
+            
+        Returns:
+            str: Filename within the data directory
+        """
+        return f"{brand_name.lower().replace(' ', '_')}_data.json"
+    
+    async def save_data_to_json(self, data: List[Dict[str, Any]], filename: str) -> None:
         """
         Save the collected data to a JSON file.
         
@@ -70,8 +97,9 @@ class SocialMediaDataCollector:
             filepath = data_dir / filename
             logger.debug(f"Saving data to {filepath}")
             
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=4)
+            data_bytes = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            async with aiofiles.open(filepath, 'wb') as f:
+                await f.write(data_bytes)
             
             logger.info(f"Successfully saved data to {filepath}")
             
@@ -79,7 +107,36 @@ class SocialMediaDataCollector:
             logger.error(f"Error saving data to file: {str(e)}")
             # Don't raise the exception, just log it
     
-    def collect_data(self, brand_name: str) -> List[Dict[str, Any]]:
+    async def load_data_from_json(self, filename: str) -> List[Dict[str, Any]]:
+        """
+        Load previously collected data from a JSON file.
+        
+        Files saved by older versions nest the counts under "engagement"; those
+        posts are flattened to the current shape as they are loaded.
+        
+        Args:
+            filename (str): Name of the file to load from
+            
+        Returns:
+            List[Dict[str, Any]]: The saved data, or an empty list if unavailable
+        """
+        filepath = Path("data") / filename
+        try:
+            async with aiofiles.open(filepath, 'rb') as f:
+                data = orjson.loads(await f.read())
+            for post in data:
+                engagement = post.pop("engagement", None)
+                if engagement is not None:
+                    post.update(engagement)
+            return data
+        except FileNotFoundError:
+            logger.warning(f"No saved data found at {filepath}")
+            return []
+        except Exception as e:
+            logger.error(f"Error loading data from file: {str(e)}")
+            return []
+    
+    async def collect_data(self, brand_name: str) -> List[Dict[str, Any]]:
         """
         Main method to collect data for a brand.
         Currently uses simulated data, but will be extended to use real APIs.
@@ -97,8 +154,7 @@ class SocialMediaDataCollector:
             data = self.generate_simulated_data(brand_name)
             
             # Save to JSON file
-            filename = f"{brand_name.lower().replace(' ', '_')}_data.json"
-            self.save_data_to_json(data, filename)
+            await self.save_data_to_json(data, self.data_filename(brand_name))
             
             logger.info(f"Completed data collection for {brand_name}")
             return data
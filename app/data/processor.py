@@ -1,9 +1,8 @@
 from typing import List, Dict, Any
-import pandas as pd
+from collections import Counter
+from itertools import islice
 from datetime import datetime
 import logging
-from textblob import TextBlob
-from app.services.gemini_service import GeminiService
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +13,8 @@ class SocialMediaDataProcessor:
             "total_engagement": 0,
             "platform_stats": {},
             "sentiment_stats": {},
-            "daily_engagement": {},
-            "raw_data": []
+            "daily_engagement": {}
         }
-        self.gemini_service = GeminiService()
     
     def process_data(self, data):
         """Process the collected social media data and generate metrics."""
@@ -29,96 +26,67 @@ class SocialMediaDataProcessor:
                     "total_engagement": 0,
                     "platform_stats": {},
                     "sentiment_stats": {},
-                    "daily_engagement": {},
-                    "raw_data": []
+                    "daily_engagement": {}
                 },
                 "insights": ["No data available for analysis."]
             }
 
-        # Store raw data for reference
-        self.metrics["raw_data"] = data
+        # Start from a fresh dict so metrics returned by earlier calls are never mutated
+        self.metrics = {}
 
-        # Convert data to DataFrame for easier processing
-        df = pd.DataFrame(data)
-
-        # Calculate total posts
-        self.metrics["total_posts"] = len(df)
-
-        # Calculate total engagement
+        # Accumulate every metric in a single pass over the posts
         total_engagement = 0
-        for _, row in df.iterrows():
-            engagement = row["engagement"]
-            total_engagement += engagement["likes"] + engagement["comments"] + engagement["shares"]
+        platform_totals = Counter()
+        platform_counts = Counter()
+        sentiment_counts = Counter()
+        daily_engagement = Counter()
+        for post in data:
+            eng_sum = post["likes"] + post["comments"] + post["shares"]
+            
+            total_engagement += eng_sum
+            platform_totals[post["platform"]] += eng_sum
+            platform_counts[post["platform"]] += 1
+            sentiment_counts[post["sentiment"]] += 1
+            daily_engagement[post["date"][:10]] += eng_sum
+
+        total_posts = len(data)
+        self.metrics["total_posts"] = total_posts
         self.metrics["total_engagement"] = total_engagement
 
         # Calculate platform statistics
         platform_stats = {}
-        for platform in df["platform"].unique():
-            platform_df = df[df["platform"] == platform]
-            platform_engagement = 0
-            for _, row in platform_df.iterrows():
-                engagement = row["engagement"]
-                platform_engagement += engagement["likes"] + engagement["comments"] + engagement["shares"]
-            
+        for platform, posts in platform_counts.items():
             platform_stats[platform] = {
-                "total_engagement": platform_engagement,
-                "posts": len(platform_df),
-                "avg_engagement": platform_engagement / len(platform_df) if len(platform_df) > 0 else 0
+                "total_engagement": platform_totals[platform],
+                "posts": posts,
+                "avg_engagement": platform_totals[platform] / posts
             }
         self.metrics["platform_stats"] = platform_stats
 
         # Calculate sentiment statistics
         sentiment_stats = {}
-        for sentiment in df["sentiment"].unique():
-            sentiment_df = df[df["sentiment"] == sentiment]
+        for sentiment, count in sentiment_counts.items():
             sentiment_stats[sentiment] = {
-                "count": len(sentiment_df),
-                "percentage": (len(sentiment_df) / len(df)) * 100
+                "count": count,
+                "percentage": count * 100.0 / total_posts
             }
         self.metrics["sentiment_stats"] = sentiment_stats
 
-        # Calculate daily engagement
-        daily_engagement = {}
-        for _, row in df.iterrows():
-            date = row["date"].split()[0]  # Get just the date part
-            engagement = row["engagement"]
-            total = engagement["likes"] + engagement["comments"] + engagement["shares"]
-            
-            if date in daily_engagement:
-                daily_engagement[date] += total
-            else:
-                daily_engagement[date] = total
-        
         # Sort daily engagement by date
         self.metrics["daily_engagement"] = dict(sorted(daily_engagement.items()))
 
-        # Generate insights using Gemini
-        insights = self.gemini_service.generate_insights("Yankee Candle", data, self.metrics)
-
-        # Convert all metrics to native Python types
-        self.metrics["total_posts"] = int(self.metrics["total_posts"])
-        self.metrics["total_engagement"] = int(self.metrics["total_engagement"])
-        
-        for platform, stats in self.metrics["platform_stats"].items():
-            stats["total_engagement"] = int(stats["total_engagement"])
-            stats["posts"] = int(stats["posts"])
-            stats["avg_engagement"] = float(stats["avg_engagement"])
-        
-        for sentiment, stats in self.metrics["sentiment_stats"].items():
-            stats["count"] = int(stats["count"])
-            stats["percentage"] = float(stats["percentage"])
-
+        # AI insights are generated by the caller once metrics are available
         return {
             "metrics": self.metrics,
-            "insights": insights
+            "insights": []
         }
     
-    def _generate_insights(self, df: pd.DataFrame) -> List[str]:
+    def _generate_insights(self, data: List[Dict[str, Any]]) -> List[str]:
         """
         Generate insights from the processed data.
         
         Args:
-            df (pd.DataFrame): Processed data
+            data (List[Dict[str, Any]]): Processed data
             
         Returns:
             List[str]: List of insights
@@ -137,8 +105,9 @@ class SocialMediaDataProcessor:
         
         # Engagement trends
         if len(self.metrics["daily_engagement"]) > 1:
-            recent_days = list(self.metrics["daily_engagement"].items())[-2:]
-            if recent_days[1][1] > recent_days[0][1]:
+            # Daily engagement is sorted by date, so read the last two days from the end
+            latest, previous = islice(reversed(self.metrics["daily_engagement"].values()), 2)
+            if latest > previous:
                 insights.append("Engagement is trending upward")
             else:
                 insights.append("Engagement is trending downward")
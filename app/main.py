@@ -1,11 +1,15 @@
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Request, HTTPException, Body, BackgroundTasks
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
+import asyncio
+import orjson
 import logging
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import List
 from dotenv import load_dotenv
 import os
 
@@ -27,8 +31,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Flush queued Google Sheets updates before the application shuts down.
+    """
+    yield
+    # The sheets worker is a daemon thread, so wait for it rather than drop its queue
+    logger.info("Waiting for queued sheet updates before shutdown")
+    await asyncio.to_thread(sheets_service.wait_for_pending)
+
 # Initialize FastAPI app
-app = FastAPI(title="Social Listening Tool")
+app = FastAPI(title="Social Listening Tool", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Get the absolute path to the static directory
 static_dir = Path(__file__).parent.parent / "static"
@@ -70,22 +84,37 @@ async def health_check():
     """
     return {"status": "healthy"}
 
+def _insights_or_fallback(ai_insights):
+    """
+    Return the generated insights, or a placeholder message if generation failed.
+    """
+    if isinstance(ai_insights, Exception):
+        logger.error(f"Error generating AI insights: {str(ai_insights)}")
+        return ["Unable to generate AI insights at this time."]
+    if not ai_insights:
+        logger.warning("No AI insights generated")
+        return ["No AI insights available at this time."]
+    return ai_insights
+
 @app.get("/api/search/{brand_name}")
-async def search_brand(brand_name: str):
+async def search_brand(brand_name: str, append: bool = False):
     """
     Search for a brand and return social media data and insights.
     
     Args:
         brand_name (str): Name of the brand to search for
+        append (bool): Add only new posts to the brand's data sheet, keeping its history
         
     Returns:
-        JSONResponse: Social media data and insights
+        ORJSONResponse: Social media data and insights
     """
     try:
         logger.info(f"Processing search request for brand: {brand_name}")
         
+        loop = asyncio.get_running_loop()
+        
         # Collect data
-        data = data_collector.collect_data(brand_name)
+        data = await data_collector.collect_data(brand_name)
         if not data:
             raise HTTPException(status_code=404, detail="No data found for the specified brand")
         
@@ -94,30 +123,143 @@ async def search_brand(brand_name: str):
         
         # Generate AI insights
         try:
-            ai_insights = gemini_service.generate_insights(brand_name, data, results["metrics"])
-            if not ai_insights:
-                logger.warning("No AI insights generated")
-                ai_insights = ["No AI insights available at this time."]
-            results["insights"] = ai_insights
+            ai_insights = await loop.run_in_executor(None, gemini_service.generate_insights, brand_name, data, results["metrics"])
         except Exception as e:
-            logger.error(f"Error generating AI insights: {str(e)}")
-            results["insights"] = ["Unable to generate AI insights at this time."]
+            ai_insights = e
+        results["insights"] = _insights_or_fallback(ai_insights)
+        
+        # Queue the data, metrics and dashboard sheets; they are written in the background with one batch_update
+        sheets_service.refresh_brand(brand_name, data, results, append=append)
+        
+        return ORJSONResponse(content=results)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing brand search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/search/batch")
+async def search_brands_batch(background_tasks: BackgroundTasks, brand_names: List[str] = Body(...), append: bool = False):
+    """
+    Search for several brands and generate their AI insights with one Gemini call.
+    
+    The brands' Google Sheets are refreshed concurrently once the response has been sent.
+    
+    Args:
+        background_tasks (BackgroundTasks): Tasks run after the response is sent
+        brand_names (List[str]): Names of the brands to search for
+        append (bool): Add only new posts to the brands' data sheets, keeping their history
         
-        # Update Google Sheets
+    Returns:
+        ORJSONResponse: Social media data and insights keyed by brand name
+    """
+    try:
+        logger.info(f"Processing batch search request for brands: {brand_names}")
+        
+        # Collect and process data for every brand
+        collected = await asyncio.gather(*(data_collector.collect_data(brand_name) for brand_name in brand_names))
+        
+        results = {}
+        batch = []
+        for brand_name, data in zip(brand_names, collected):
+            results[brand_name] = data_processor.process_data(data)
+            if data:
+                batch.append((brand_name, data, results[brand_name]["metrics"]))
+        
+        if not batch:
+            raise HTTPException(status_code=404, detail="No data found for the specified brands")
+        
+        # Generate AI insights for all brands in a single request
+        loop = asyncio.get_running_loop()
         try:
-            sheets_service.update_data_sheet(brand_name, data)
-            sheets_service.update_metrics_sheet(brand_name, results)
-            sheets_service.create_dashboard_sheet(brand_name)
+            batch_insights = await loop.run_in_executor(None, gemini_service.generate_insights_batch, batch)
         except Exception as e:
-            logger.error(f"Error updating Google Sheets: {str(e)}")
-            # Don't raise the exception, just log it
+            batch_insights = {brand_name: e for brand_name, _, _ in batch}
+        
+        for brand_name, _, _ in batch:
+            results[brand_name]["insights"] = _insights_or_fallback(batch_insights.get(brand_name))
         
-        return JSONResponse(content=results)
+        # Write every brand's sheets concurrently after responding
+        background_tasks.add_task(
+            sheets_service.refresh_brands_async,
+            [(brand_name, data, results[brand_name]) for brand_name, data, _ in batch],
+            append
+        )
+        
+        return ORJSONResponse(content=results)
     
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing brand search: {str(e)}")
+        logger.error(f"Error processing batch brand search: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/search/{brand_name}/stream")
+async def stream_brand(brand_name: str):
+    """
+    Search for a brand and stream the results as newline-delimited JSON.
+    
+    The metrics line is sent first, followed by one line per post and a final
+    insights line once the AI insights are ready. Google Sheets is not updated.
+    
+    Args:
+        brand_name (str): Name of the brand to search for
+        
+    Returns:
+        StreamingResponse: NDJSON stream of metrics, posts and insights
+    """
+    logger.info(f"Processing streaming search request for brand: {brand_name}")
+    
+    data = await data_collector.collect_data(brand_name)
+    if not data:
+        raise HTTPException(status_code=404, detail="No data found for the specified brand")
+    
+    results = data_processor.process_data(data)
+    
+    # Start generating insights now so they overlap with streaming the posts
+    loop = asyncio.get_running_loop()
+    insights_future = loop.run_in_executor(
+        None, gemini_service.generate_insights, brand_name, data, results["metrics"]
+    )
+    
+    async def generate():
+        try:
+            yield orjson.dumps({"type": "metrics", "data": results["metrics"]}) + b"\n"
+            for post in data:
+                yield orjson.dumps({"type": "post", "data": post}) + b"\n"
+            
+            try:
+                ai_insights = await insights_future
+            except Exception as e:
+                ai_insights = e
+            yield orjson.dumps({"type": "insights", "data": _insights_or_fallback(ai_insights)}) + b"\n"
+        finally:
+            # The client may disconnect before the insights line; don't leave the future unobserved
+            if not insights_future.done():
+                insights_future.cancel()
+            elif not insights_future.cancelled():
+                insights_future.exception()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get("/api/raw/{brand_name}")
+async def get_raw_data(brand_name: str):
+    """
+    Return the raw social media data from the most recent search for a brand.
+    
+    Args:
+        brand_name (str): Name of the brand
+        
+    Returns:
+        ORJSONResponse: Raw social media posts
+    """
+    data = await data_collector.load_data_from_json(data_collector.data_filename(brand_name))
+    if not data:
+        raise HTTPException(status_code=404, detail="No data found for the specified brand")
+    
+    return ORJSONResponse(content=data)
+
 if __name__ == "__main__":
     logger.debug("Starting the application")
     uvicorn.run(
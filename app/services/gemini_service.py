@@ -1,25 +1,192 @@
 import os
+import re
+import hashlib
+import functools
 import logging
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Tuple
+import orjson
 import google.generativeai as genai
-from tenacity import retry, stop_after_attempt, wait_exponential
+from cachetools import TTLCache
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 
 logger = logging.getLogger(__name__)
 
+_SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    }
+]
+
+_GEN_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 1024,
+}
+
+# Output tokens budgeted per brand in a batch request (3-5 insights plus JSON overhead)
+_BATCH_TOKENS_PER_BRAND = 512
+
+# Most brands sent in one batch request, keeping the reply within the model's 8192 output tokens
+_MAX_BATCH_BRANDS = 16
+
+# Leading numbering / bullet characters stripped from each insight line
+_LEADING_JUNK = re.compile(r'^[\d.\*\-\s]+')
+
+# Markdown code fence the model sometimes wraps JSON responses in
+_CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+@functools.lru_cache(maxsize=1)
+def _get_model() -> genai.GenerativeModel:
+    """
+    Configure the Gemini client and build the model once per process.
+    
+    Returns:
+        genai.GenerativeModel: Shared Gemini model
+    """
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY environment variable not set")
+    
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel('gemini-2.0-flash')
+
 class GeminiService:
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
+        self.model = _get_model()
         
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        # Short-lived cache so repeated requests for identical metrics skip the API.
+        # It only pays off for deterministic input: every simulated collection
+        # produces new metrics, so with simulated data it will rarely hit.
+        self._insights_cache = TTLCache(maxsize=128, ttl=300)
+        self._insights_cache_lock = threading.Lock()
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def generate_insights(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any]) -> List[str]:
         """
         Generate AI-powered insights using the Gemini API.
         
+        Results are cached for a few minutes, keyed on the brand and the metrics
+        summary sent in the prompt. Repeated calls only hit the cache when the
+        metrics are unchanged, so simulated data effectively bypasses it.
+        
+        Args:
+            brand_name (str): Name of the brand
+            data (List[Dict[str, Any]]): Raw social media data
+            metrics (Dict[str, Any]): Processed metrics
+            
+        Returns:
+            List[str]: List of AI-generated insights
+        """
+        cache_key = self._insights_cache_key(brand_name, metrics)
+        with self._insights_cache_lock:
+            cached = self._insights_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Using cached AI insights for {brand_name}")
+            return list(cached)
+        
+        insights = self._request_insights(brand_name, data, metrics)
+        with self._insights_cache_lock:
+            self._insights_cache[cache_key] = tuple(insights)
+        return insights
+    
+    def generate_insights_batch(self, brands: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]) -> Dict[str, List[str]]:
+        """
+        Generate AI-powered insights for several brands with as few Gemini API calls as possible.
+        
+        Brands are sent in groups of up to _MAX_BATCH_BRANDS, one call per group.
+        
+        Args:
+            brands (List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]): (brand name, raw data, metrics) per brand
+            
+        Returns:
+            Dict[str, List[str]]: AI-generated insights keyed by brand name
+        """
+        insights = {}
+        for start in range(0, len(brands), _MAX_BATCH_BRANDS):
+            insights.update(self._request_insights_batch(brands[start:start + _MAX_BATCH_BRANDS]))
+        return insights
+    
+    # A reply that is not valid JSON will not parse any better on a retry
+    @retry(retry=retry_if_not_exception_type(ValueError), stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _request_insights_batch(self, brands: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]) -> Dict[str, List[str]]:
+        """
+        Call the Gemini API once for a group of brands and parse the JSON response.
+        
+        Args:
+            brands (List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]): (brand name, raw data, metrics) per brand
+            
+        Returns:
+            Dict[str, List[str]]: AI-generated insights keyed by brand name
+        """
+        try:
+            prompt = self._create_batch_prompt(brands)
+            
+            # Give the reply room for every brand's insights so the JSON is not cut off
+            generation_config = {
+                **_GEN_CONFIG,
+                "max_output_tokens": max(_GEN_CONFIG["max_output_tokens"], _BATCH_TOKENS_PER_BRAND * len(brands))
+            }
+            
+            response = self.model.generate_content(
+                contents=prompt,
+                safety_settings=_SAFETY_SETTINGS,
+                generation_config=generation_config
+            )
+            
+            # The model is asked for a JSON object, but may still wrap it in a code fence
+            parsed = orjson.loads(_CODE_FENCE.sub('', response.text.strip()))
+            if not isinstance(parsed, dict):
+                raise ValueError("Batch response is not a JSON object")
+            
+            insights = {}
+            for brand_name, _, _ in brands:
+                brand_insights = parsed.get(brand_name, [])
+                if isinstance(brand_insights, str):
+                    brand_insights = [brand_insights]
+                insights[brand_name] = self._parse_insights("\n".join(str(item) for item in brand_insights))
+            
+            logger.info(f"Generated AI insights for {len(brands)} brands in one request")
+            return insights
+            
+        except Exception as e:
+            logger.error(f"Error generating batch AI insights: {str(e)}")
+            raise  # Re-raise to trigger retry (except for unparseable replies)
+    
+    def _insights_cache_key(self, brand_name: str, metrics: Dict[str, Any]) -> tuple:
+        """
+        Build a stable cache key from the brand name and the metrics summary used in the prompt.
+        
+        Fields the prompt never sees, such as daily_engagement, do not affect the key.
+        
+        Args:
+            brand_name (str): Name of the brand
+            metrics (Dict[str, Any]): Processed metrics
+            
+        Returns:
+            tuple: Hashable cache key
+        """
+        metrics_digest = hashlib.sha1(self._summarize_metrics(metrics).encode()).hexdigest()
+        return (brand_name, metrics_digest)
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _request_insights(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any]) -> List[str]:
+        """
+        Call the Gemini API and parse the response into insights.
+        
         Args:
             brand_name (str): Name of the brand
             data (List[Dict[str, Any]]): Raw social media data
@@ -33,34 +200,10 @@ class GeminiService:
             prompt = self._create_analysis_prompt(brand_name, data, metrics)
             
             # Generate response with safety settings
-            safety_settings = [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                }
-            ]
-            
             response = self.model.generate_content(
                 contents=prompt,
-                safety_settings=safety_settings,
-                generation_config={
-                    "temperature": 0.7,
-                    "top_p": 0.8,
-                    "top_k": 40,
-                    "max_output_tokens": 1024,
-                }
+                safety_settings=_SAFETY_SETTINGS,
+                generation_config=_GEN_CONFIG
             )
             
             # Parse and format insights
@@ -73,17 +216,15 @@ class GeminiService:
             logger.error(f"Error generating AI insights: {str(e)}")
             raise  # Re-raise to trigger retry
     
-    def _create_analysis_prompt(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any]) -> str:
+    def _summarize_metrics(self, metrics: Dict[str, Any]) -> str:
         """
-        Create a prompt for the Gemini API.
+        Summarize the key metrics, platform performance and sentiment for a prompt.
         
         Args:
-            brand_name (str): Name of the brand
-            data (List[Dict[str, Any]]): Raw social media data
             metrics (Dict[str, Any]): Processed metrics
             
         Returns:
-            str: Formatted prompt
+            str: Formatted metrics summary
         """
         # Extract key metrics
         total_posts = metrics["total_posts"]
@@ -106,9 +247,7 @@ class GeminiService:
         # Calculate engagement rate
         engagement_rate = (total_engagement / total_posts) if total_posts > 0 else 0
         
-        prompt = f"""As a social media analytics expert, analyze the following data for {brand_name} and provide actionable insights.
-
-Key Performance Indicators:
+        return f"""Key Performance Indicators:
 - Total Posts: {total_posts:,}
 - Total Engagement: {total_engagement:,}
 - Average Engagement Rate: {engagement_rate:.2f} per post
@@ -117,7 +256,25 @@ Platform Performance:
 {platform_summary_text}
 
 Sentiment Distribution:
-{sentiment_summary_text}
+{sentiment_summary_text}"""
+    
+    def _create_analysis_prompt(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any]) -> str:
+        """
+        Create a prompt for the Gemini API.
+        
+        Args:
+            brand_name (str): Name of the brand
+            data (List[Dict[str, Any]]): Raw social media data
+            metrics (Dict[str, Any]): Processed metrics
+            
+        Returns:
+            str: Formatted prompt
+        """
+        metrics_summary = self._summarize_metrics(metrics)
+        
+        prompt = f"""As a social media analytics expert, analyze the following data for {brand_name} and provide actionable insights.
+
+{metrics_summary}
 
 Please provide 3-5 actionable insights about:
 1. Overall brand performance and engagement trends
@@ -130,6 +287,32 @@ Format each insight as a clear, concise statement with specific recommendations
 
         return prompt
     
+    def _create_batch_prompt(self, brands: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]) -> str:
+        """
+        Create a single prompt covering several brands for the Gemini API.
+        
+        Args:
+            brands (List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]): (brand name, raw data, metrics) per brand
+            
+        Returns:
+            str: Formatted prompt
+        """
+        brand_sections = []
+        for brand_name, _, metrics in brands:
+            brand_sections.append(f"=== BRAND: {brand_name} ===\n{self._summarize_metrics(metrics)}")
+        brand_sections_text = "\n\n".join(brand_sections)
+        brand_names_text = ", ".join(orjson.dumps(brand_name).decode() for brand_name, _, _ in brands)
+        
+        prompt = f"""As a social media analytics expert, analyze the following data for each brand and provide actionable insights.
+
+{brand_sections_text}
+
+For each brand, provide 3-5 actionable insights about overall performance and engagement trends, platform-specific recommendations, sentiment and brand perception, content strategy, and opportunities for growth.
+
+Respond with only a JSON object whose keys are exactly the brand names ({brand_names_text}) and whose values are lists of insight strings. Each insight should be a clear, concise statement without markdown formatting or special characters."""
+
+        return prompt
+    
     def _parse_insights(self, response_text: str) -> List[str]:
         """
         Parse the Gemini API response into a list of insights.
@@ -140,22 +323,25 @@ Format each insight as a clear, concise statement with specific recommendations
         Returns:
             List[str]: List of formatted insights
         """
-        # Split response into lines and clean up
-        insights = [line.strip() for line in response_text.split('\n') if line.strip()]
-        
-        # Remove any numbering or bullet points
-        insights = [insight.lstrip('1234567890.*- ') for insight in insights]
-        
-        # Filter out any empty or very short insights
-        insights = [insight for insight in insights if len(insight) > 10]
-        
-        # Ensure each insight starts with a capital letter and ends with a period
-        insights = [insight[0].upper() + insight[1:] if insight else insight for insight in insights]
-        insights = [insight + '.' if not insight.endswith('.') else insight for insight in insights]
-        
-        # Format insights with bullet points
         formatted_insights = []
-        for insight in insights[:5]:  # Limit to top 5 insights
+        for raw in response_text.split('\n'):
+            # Skip empty or very short lines before doing any regex work
+            insight = raw.strip()
+            if len(insight) <= 10:
+                continue
+            
+            # Remove any numbering or bullet points, then re-check the length
+            insight = _LEADING_JUNK.sub('', insight, count=1)
+            if len(insight) <= 10:
+                continue
+            
+            # Ensure each insight starts with a capital letter and ends with a period
+            insight = insight[0].upper() + insight[1:]
+            if not insight.endswith('.'):
+                insight += '.'
+            
             formatted_insights.append(f"• {insight}")
+            if len(formatted_insights) == 5:  # Limit to top 5 insights
+                break
         
-        return formatted_insights 
\ No newline at end of file
+        return formatted_insights
@@ -1,58 +1,470 @@
 import os
 import json
-from typing import List, Dict, Any
+import time
+import asyncio
+import weakref
+import queue
+import functools
+import threading
+from typing import List, Dict, Any, NamedTuple, Set, Tuple
 import logging
 from google.oauth2.service_account import Credentials
 import gspread
+from gspread.exceptions import APIError
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol
 from datetime import datetime
-import pandas as pd
-import base64
 
 logger = logging.getLogger(__name__)
 
+# Scopes required to read and create spreadsheets
+_SCOPES = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Seconds a spreadsheet handle is reused before it is looked up again
+_SPREADSHEET_CACHE_TTL = 600
+
+# Seconds the background worker waits for more updates to coalesce with
+_COALESCE_WINDOW = 0.5
+
+# Maximum number of rows sent to the Raw Data sheet in a single update request
+_DATA_SHEET_CHUNK_SIZE = 5000
+
+# Background colors for the sentiment percentage cells of the metrics sheet
+_LIGHT_GREEN_ROW = {"values": [{"userEnteredFormat": {"backgroundColor": {"red": 0.8, "green": 1, "blue": 0.8}}}]}
+_LIGHT_YELLOW_ROW = {"values": [{"userEnteredFormat": {"backgroundColor": {"red": 1, "green": 1, "blue": 0.8}}}]}
+_LIGHT_RED_ROW = {"values": [{"userEnteredFormat": {"backgroundColor": {"red": 1, "green": 0.8, "blue": 0.8}}}]}
+
+# Column headers of the Raw Data sheet
+_DATA_HEADERS = ["Date", "Platform", "Content", "Likes", "Comments", "Shares", "Sentiment", "URL"]
+
+# Maximum number of brand refreshes sent to the Sheets API at the same time
+_MAX_CONCURRENT_REFRESHES = 5
+
+# Sheets API status codes that are worth retrying (rate limit and transient server errors)
+_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Rate limited requests are rejected before any work is done, so even writes that must not be
+# applied twice can be retried on this status
+_RATE_LIMITED_STATUS_CODE = 429
+
+# batch_update requests whose effect is repeated if the same batch is sent twice
+_NON_IDEMPOTENT_REQUESTS = ("appendCells", "addSheet")
+
+# Longest delay between retries, in seconds
+_MAX_RETRY_WAIT = 60
+
+_backoff = wait_exponential_jitter(initial=1, max=_MAX_RETRY_WAIT)
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket that allows `rate` calls every `per` seconds.
+    """
+    def __init__(self, rate: int, per: float):
+        self.capacity = rate
+        self.fill_rate = rate / per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """
+        Take one token, blocking until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.fill_rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.fill_rate
+            time.sleep(wait)
+
+# Process-wide limiter keeping Sheets calls under the per-user quota of 100 requests per 100 seconds
+_bucket = _TokenBucket(rate=100, per=100.0)
+
+# One refresh semaphore per event loop, since asyncio primitives cannot be shared between loops
+_refresh_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _refresh_semaphore() -> asyncio.Semaphore:
+    """
+    Get the semaphore bounding concurrent brand refreshes on the running event loop.
+    
+    Returns:
+        asyncio.Semaphore: Semaphore with _MAX_CONCURRENT_REFRESHES slots
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _refresh_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _refresh_semaphores[loop] = asyncio.Semaphore(_MAX_CONCURRENT_REFRESHES)
+    return semaphore
+
+def _is_retryable(exception: BaseException) -> bool:
+    """
+    Check whether a failed Sheets API call should be retried.
+    
+    Args:
+        exception (BaseException): Exception raised by the call
+        
+    Returns:
+        bool: True for rate limit and transient server errors
+    """
+    return isinstance(exception, APIError) and exception.response.status_code in _RETRYABLE_STATUS_CODES
+
+def _is_rate_limited(exception: BaseException) -> bool:
+    """
+    Check whether a failed Sheets API call was rejected by the rate limit.
+    
+    Args:
+        exception (BaseException): Exception raised by the call
+        
+    Returns:
+        bool: True for rate limit errors
+    """
+    return isinstance(exception, APIError) and exception.response.status_code == _RATE_LIMITED_STATUS_CODE
+
+def _retry_wait(retry_state) -> float:
+    """
+    Wait for the server-provided Retry-After delay if present, else back off exponentially.
+    
+    Args:
+        retry_state: tenacity retry state
+        
+    Returns:
+        float: Seconds to wait before the next attempt
+    """
+    exception = retry_state.outcome.exception()
+    retry_after = exception.response.headers.get("Retry-After") if isinstance(exception, APIError) else None
+    try:
+        return min(float(retry_after), _MAX_RETRY_WAIT)
+    except (TypeError, ValueError):
+        return _backoff(retry_state)
+
+@retry(retry=retry_if_exception(_is_retryable), wait=_retry_wait, stop=stop_after_attempt(6), reraise=True)
+def _call_api(func, *args, **kwargs):
+    """
+    Call a gspread method through the rate limiter, retrying on rate limit and transient server errors.
+    
+    Only for calls that are safe to repeat; see _call_non_idempotent_api for the others.
+    
+    Args:
+        func: gspread method to call
+        *args: Positional arguments for the method
+        **kwargs: Keyword arguments for the method
+        
+    Returns:
+        Any: The method's return value
+    """
+    _bucket.acquire()
+    return func(*args, **kwargs)
+
+@retry(retry=retry_if_exception(_is_rate_limited), wait=_retry_wait, stop=stop_after_attempt(6), reraise=True)
+def _call_non_idempotent_api(func, *args, **kwargs):
+    """
+    Call a gspread method that must not be applied twice, retrying only on rate limit errors.
+    
+    A server error can arrive after the write was applied, so retrying it could
+    create a second spreadsheet or duplicate appended rows.
+    
+    Args:
+        func: gspread method to call
+        *args: Positional arguments for the method
+        **kwargs: Keyword arguments for the method
+        
+    Returns:
+        Any: The method's return value
+    """
+    _bucket.acquire()
+    return func(*args, **kwargs)
+
+def _batch_update(spreadsheet: gspread.Spreadsheet, requests: List[Dict[str, Any]]) -> None:
+    """
+    Send batch_update requests, retrying server errors only when the batch is safe to repeat.
+    
+    Args:
+        spreadsheet (gspread.Spreadsheet): Spreadsheet to update
+        requests (List[Dict[str, Any]]): batch_update requests
+    """
+    if any(kind in request for request in requests for kind in _NON_IDEMPOTENT_REQUESTS):
+        _call_non_idempotent_api(spreadsheet.batch_update, {"requests": requests})
+    else:
+        _call_api(spreadsheet.batch_update, {"requests": requests})
+
+def _cell_value(value: Any, raw: bool = False) -> Dict[str, Any]:
+    """
+    Convert a Python value into a Sheets API ExtendedValue.
+    
+    Args:
+        value (Any): Value to write to a cell
+        raw (bool): Store strings starting with "=" as text rather than formulas
+        
+    Returns:
+        Dict[str, Any]: ExtendedValue payload
+    """
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, (int, float)):
+        return {"numberValue": value}
+    value = str(value)
+    if not raw and value.startswith("="):
+        return {"formulaValue": value}
+    return {"stringValue": value}
+
+def _cell_data(value: Any, cell_format: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Convert a Python value, and optionally its format, into Sheets API CellData.
+    
+    Args:
+        value (Any): Value to write to a cell
+        cell_format (Dict[str, Any]): CellFormat payload, if the cell is formatted too
+        
+    Returns:
+        Dict[str, Any]: CellData payload
+    """
+    cell = {"userEnteredValue": _cell_value(value)}
+    if cell_format:
+        cell["userEnteredFormat"] = cell_format
+    return cell
+
+def _format_decimal(value: float) -> str:
+    """
+    Format a number with two decimal places for the metrics sheet.
+    
+    Args:
+        value (float): Number to format
+        
+    Returns:
+        str: Formatted number
+    """
+    return "%.2f" % value
+
+def _format_percentage(value: float) -> str:
+    """
+    Format a percentage with one decimal place for the metrics sheet.
+    
+    Args:
+        value (float): Percentage to format
+        
+    Returns:
+        str: Formatted percentage, e.g. "42.5%"
+    """
+    return "%.1f%%" % value
+
+def _sentiment_color_row(percentage: float) -> Dict[str, Any]:
+    """
+    Build the RowData that colors a sentiment percentage cell.
+    
+    Args:
+        percentage (float): Share of posts with the sentiment
+        
+    Returns:
+        Dict[str, Any]: RowData with the cell's background color
+    """
+    if percentage > 50:
+        return _LIGHT_GREEN_ROW
+    if percentage > 25:
+        return _LIGHT_YELLOW_ROW
+    return _LIGHT_RED_ROW
+
+def _row_data(rows: List[List[Any]], raw: bool = False) -> List[Dict[str, Any]]:
+    """
+    Convert rows of Python values into Sheets API RowData.
+    
+    Args:
+        rows (List[List[Any]]): Values to write, row by row
+        raw (bool): Store strings starting with "=" as text rather than formulas
+        
+    Returns:
+        List[Dict[str, Any]]: RowData payloads
+    """
+    return [{"values": [{"userEnteredValue": _cell_value(value, raw)} for value in values]} for values in rows]
+
+def _data_rows(posts: List[Dict[str, Any]]) -> List[List[Any]]:
+    """
+    Convert posts into Raw Data sheet rows, in _DATA_HEADERS order.
+    
+    Counts are coerced to int and the other fields to str so the rows
+    serialize without per-cell type checks.
+    
+    Args:
+        posts (List[Dict[str, Any]]): Social media posts
+        
+    Returns:
+        List[List[Any]]: One row per post
+    """
+    return [
+        [
+            str(d["date"]),
+            str(d["platform"]),
+            str(d["content"]),
+            int(d["likes"] or 0),
+            int(d["comments"] or 0),
+            int(d["shares"] or 0),
+            str(d["sentiment"]),
+            str(d["url"])
+        ]
+        for d in posts
+    ]
+
+class _SheetGrid(NamedTuple):
+    """
+    ID and grid size of a worksheet that is added earlier in the same batch_update.
+    """
+    id: int
+    row_count: int
+    col_count: int
+
+def _clear_values_request(sheet_id: int) -> Dict[str, Any]:
+    """
+    Build a batch_update request that clears every value on a worksheet.
+    
+    Args:
+        sheet_id (int): ID of the worksheet
+        
+    Returns:
+        Dict[str, Any]: updateCells request
+    """
+    return {"updateCells": {"range": {"sheetId": sheet_id}, "fields": "userEnteredValue"}}
+
+def _resize_requests(sheet: gspread.Worksheet, rows: int, cols: int) -> List[Dict[str, Any]]:
+    """
+    Build batch_update requests that grow a worksheet to fit the given grid.
+    
+    Args:
+        sheet (gspread.Worksheet): Worksheet to grow
+        rows (int): Number of rows required
+        cols (int): Number of columns required
+        
+    Returns:
+        List[Dict[str, Any]]: appendDimension requests (empty if the sheet is large enough)
+    """
+    requests = []
+    if sheet.row_count < rows:
+        requests.append({"appendDimension": {"sheetId": sheet.id, "dimension": "ROWS", "length": rows - sheet.row_count}})
+    if sheet.col_count < cols:
+        requests.append({"appendDimension": {"sheetId": sheet.id, "dimension": "COLUMNS", "length": cols - sheet.col_count}})
+    return requests
+
+def _update_cells_request(sheet_id: int, rows: List[List[Any]], start: str = "A1", raw: bool = False) -> Dict[str, Any]:
+    """
+    Build a batch_update request that writes a block of values.
+    
+    Args:
+        sheet_id (int): ID of the worksheet
+        rows (List[List[Any]]): Values to write, row by row
+        start (str): A1 notation of the top-left cell
+        raw (bool): Store strings starting with "=" as text rather than formulas
+        
+    Returns:
+        Dict[str, Any]: updateCells request
+    """
+    row, col = a1_to_rowcol(start)
+    return {
+        "updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": row - 1, "columnIndex": col - 1},
+            "rows": _row_data(rows, raw),
+            "fields": "userEnteredValue"
+        }
+    }
+
+def _repeat_cell_request(sheet_id: int, a1_range: str, cell_format: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a batch_update request that applies a format to a range, like Worksheet.format.
+    
+    Args:
+        sheet_id (int): ID of the worksheet
+        a1_range (str): Range in A1 notation
+        cell_format (Dict[str, Any]): CellFormat payload
+        
+    Returns:
+        Dict[str, Any]: repeatCell request
+    """
+    return {
+        "repeatCell": {
+            "range": a1_range_to_grid_range(a1_range, sheet_id),
+            "cell": {"userEnteredFormat": cell_format},
+            "fields": f"userEnteredFormat({','.join(cell_format.keys())})"
+        }
+    }
+
+@functools.lru_cache(maxsize=1)
+def _load_credentials() -> Credentials:
+    """
+    Read and parse the service account credentials from the environment once per process.
+    
+    Returns:
+        Credentials: Service account credentials scoped for Sheets and Drive
+    """
+    # Get the credentials JSON string from environment variable
+    creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
+    if not creds_json:
+        raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable is not set")
+
+    try:
+        # Parse the JSON string
+        credentials_info = json.loads(creds_json)
+        logger.debug("Successfully parsed credentials JSON")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse credentials JSON: {str(e)}")
+        raise ValueError("Invalid JSON format in GOOGLE_CREDENTIALS_JSON")
+
+    try:
+        # Create credentials from the JSON
+        credentials = Credentials.from_service_account_info(
+            credentials_info,
+            scopes=_SCOPES
+        )
+        logger.debug("Credentials created successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize credentials: {str(e)}")
+        raise
+    
+    return credentials
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> Tuple[Credentials, gspread.Client]:
+    """
+    Build the authorized gspread client once per process.
+    
+    Returns:
+        Tuple[Credentials, gspread.Client]: Shared credentials and client
+    """
+    try:
+        credentials = _load_credentials()
+        
+        # Initialize gspread client
+        client = gspread.authorize(credentials)
+        logger.debug("gspread authorization successful")
+        
+        return credentials, client
+    
+    except Exception as e:
+        logger.error(f"Failed to initialize Google Sheets client: {str(e)}")
+        raise
+
 class GoogleSheetsService:
     def __init__(self):
-        try:
-            # Get the credentials JSON string from environment variable
-            creds_json = os.getenv("GOOGLE_CREDENTIALS_JSON")
-            if not creds_json:
-                raise ValueError("GOOGLE_CREDENTIALS_JSON environment variable is not set")
-
-            try:
-                # Parse the JSON string
-                credentials_info = json.loads(creds_json)
-                logger.debug("Successfully parsed credentials JSON")
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse credentials JSON: {str(e)}")
-                raise ValueError("Invalid JSON format in GOOGLE_CREDENTIALS_JSON")
-
-            # Define the required scopes
-            self.scope = [
-                'https://spreadsheets.google.com/feeds',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            try:
-                # Create credentials from the JSON
-                self.credentials = Credentials.from_service_account_info(
-                    credentials_info,
-                    scopes=self.scope
-                )
-                logger.debug("Credentials created successfully")
-                
-                # Initialize gspread client
-                self.client = gspread.authorize(self.credentials)
-                logger.debug("gspread authorization successful")
-                
-                self.spreadsheet = None
-                logger.info("Successfully initialized Google Sheets service")
-            except Exception as e:
-                logger.error(f"Failed to initialize credentials: {str(e)}")
-                raise
-                
-        except Exception as e:
-            logger.error(f"Failed to initialize Google Sheets service: {str(e)}")
-            raise
+        # The authorized client is shared by every instance in the process
+        self.scope = _SCOPES
+        self.credentials, self.client = _get_client()
+        
+        self.spreadsheet = None
+        self._spreadsheet_cache: Dict[str, Tuple[float, gspread.Spreadsheet]] = {}
+        self._uploaded_posts: Dict[str, Set[Tuple[str, str]]] = {}
+        
+        # Writes for one brand never overlap, whether they come from the queue or refresh_brand_async
+        self._brand_locks: Dict[str, threading.Lock] = {}
+        self._brand_locks_guard = threading.Lock()
+        
+        # Sheet updates are queued and written by a background worker, off the caller's thread
+        self._job_queue: "queue.Queue[Tuple[str, str, Dict[str, Any]]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run_worker, name="sheets-worker", daemon=True)
+        self._worker.start()
+        logger.info("Successfully initialized Google Sheets service")
     
     def create_or_get_spreadsheet(self, brand_name: str) -> gspread.Spreadsheet:
         """
@@ -64,233 +476,502 @@ class GoogleSheetsService:
         Returns:
             gspread.Spreadsheet: The spreadsheet object
         """
+        # Reuse the handle from a recent lookup for this brand
+        cached = self._spreadsheet_cache.get(brand_name)
+        if cached is not None and time.monotonic() - cached[0] < _SPREADSHEET_CACHE_TTL:
+            self.spreadsheet = cached[1]
+            return cached[1]
+        
+        # Try to find existing spreadsheet (kept in a local, as refreshes for
+        # other brands may run in other threads)
+        spreadsheet_name = f"Social Listening - {brand_name}"
         try:
-            # Try to find existing spreadsheet
-            spreadsheet_name = f"Social Listening - {brand_name}"
-            try:
-                self.spreadsheet = self.client.open(spreadsheet_name)
-                logger.info(f"Found existing spreadsheet for {brand_name}")
-            except gspread.SpreadsheetNotFound:
-                # Create new spreadsheet
-                self.spreadsheet = self.client.create(spreadsheet_name)
-                logger.info(f"Created new spreadsheet for {brand_name}")
+            spreadsheet = _call_api(self.client.open, spreadsheet_name)
+            logger.info(f"Found existing spreadsheet for {brand_name}")
+        except gspread.SpreadsheetNotFound:
+            # Create new spreadsheet
+            spreadsheet = _call_non_idempotent_api(self.client.create, spreadsheet_name)
+            logger.info(f"Created new spreadsheet for {brand_name}")
+        
+        self.spreadsheet = spreadsheet
+        self._spreadsheet_cache[brand_name] = (time.monotonic(), spreadsheet)
+        return spreadsheet
+    
+    def wait_for_pending(self) -> None:
+        """
+        Block until every queued sheet update has been processed.
+        """
+        self._job_queue.join()
+    
+    def _enqueue(self, job: str, brand_name: str, **kwargs: Any) -> None:
+        """
+        Add a sheet update job to the background worker's queue.
+        
+        Args:
+            job (str): Name of the update (matches a _do_<job> method)
+            brand_name (str): Name of the brand
+            **kwargs: Arguments for the update
+        """
+        self._job_queue.put((job, brand_name, kwargs))
+        logger.debug(f"Queued {job} for {brand_name}")
+    
+    def _run_worker(self) -> None:
+        """
+        Process queued sheet updates one batch at a time, forever.
+        """
+        while True:
+            jobs = [self._job_queue.get()]
+            
+            # Give closely spaced updates a moment to arrive so they can be coalesced
+            deadline = time.monotonic() + _COALESCE_WINDOW
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    jobs.append(self._job_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            for job, brand_name, kwargs in self._coalesce(jobs):
+                try:
+                    self._run_job(job, brand_name, kwargs)
+                except Exception:
+                    logger.exception(f"Queued {job} for {brand_name} failed")
+            
+            for _ in jobs:
+                self._job_queue.task_done()
+    
+    def _run_job(self, job: str, brand_name: str, kwargs: Dict[str, Any]) -> None:
+        """
+        Run a sheet update while holding the brand's lock.
+        
+        Args:
+            job (str): Name of the update (matches a _do_<job> method)
+            brand_name (str): Name of the brand
+            kwargs (Dict[str, Any]): Arguments for the update
+        """
+        with self._brand_locks_guard:
+            lock = self._brand_locks.setdefault(brand_name, threading.Lock())
+        with lock:
+            getattr(self, f"_do_{job}")(brand_name, **kwargs)
+    
+    @staticmethod
+    def _coalesce(jobs: List[Tuple[str, str, Dict[str, Any]]]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Merge queued jobs that target the same brand.
+        
+        Two jobs that both append posts are combined, skipping posts the
+        pending job already carries, so no posts are lost or duplicated.
+        Otherwise only the latest job is kept: a replacing upload supersedes
+        whatever was queued before it, and an appending one supersedes a
+        pending replace, as its posts are added to the sheet's history anyway.
+        
+        Args:
+            jobs (List[Tuple[str, str, Dict[str, Any]]]): Jobs in the order they were queued
             
-            return self.spreadsheet
+        Returns:
+            List[Tuple[str, str, Dict[str, Any]]]: Coalesced jobs, in order of first arrival
+        """
+        merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for job, brand_name, kwargs in jobs:
+            key = (job, brand_name)
+            previous = merged.get(key)
+            if previous is not None and previous.get("append") and kwargs.get("append"):
+                queued = {(d["date"], d["url"]) for d in previous["data"]}
+                kwargs = {
+                    **kwargs,
+                    "data": previous["data"] + [d for d in kwargs["data"] if (d["date"], d["url"]) not in queued]
+                }
+            merged[key] = kwargs
+        return [(job, brand_name, kwargs) for (job, brand_name), kwargs in merged.items()]
+    
+    def refresh_brand(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any], append: bool = False) -> None:
+        """
+        Queue an update of the data, metrics and dashboard sheets as one batch_update.
+        
+        Args:
+            brand_name (str): Name of the brand
+            data (List[Dict[str, Any]]): Social media data
+            metrics (Dict[str, Any]): Processed metrics and insights
+            append (bool): Append only posts not yet on the data sheet instead of replacing its contents
+        """
+        self._enqueue("refresh_brand", brand_name, data=data, metrics=metrics, append=append)
+    
+    async def refresh_brand_async(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any], append: bool = False) -> None:
+        """
+        Update the data, metrics and dashboard sheets for a brand without blocking the event loop.
+        
+        Unlike refresh_brand, the update is not queued: it runs in a worker thread
+        and completes before this returns. At most _MAX_CONCURRENT_REFRESHES
+        refreshes are in flight at once, and it waits for any queued update of
+        the same brand that is already being written.
         
-        except Exception as e:
-            logger.error(f"Error creating/getting spreadsheet: {str(e)}")
-            raise
+        Args:
+            brand_name (str): Name of the brand
+            data (List[Dict[str, Any]]): Social media data
+            metrics (Dict[str, Any]): Processed metrics and insights
+            append (bool): Append only posts not yet on the data sheet instead of replacing its contents
+        """
+        async with _refresh_semaphore():
+            await asyncio.to_thread(self._run_job, "refresh_brand", brand_name, {"data": data, "metrics": metrics, "append": append})
     
-    def update_data_sheet(self, brand_name: str, data: List[Dict[str, Any]]) -> None:
+    async def refresh_brands_async(self, brands: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]], append: bool = False) -> None:
         """
-        Update the data sheet with new social media data.
+        Update the sheets of several brands concurrently.
+        
+        A brand listed more than once is refreshed once, the same way queued
+        updates are coalesced. Failures are logged per brand and do not stop
+        the other refreshes.
+        
+        Args:
+            brands (List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]): (brand name, data, metrics) for each brand
+            append (bool): Append only posts not yet on the data sheets instead of replacing their contents
+        """
+        jobs = self._coalesce([
+            ("refresh_brand", brand_name, {"data": data, "metrics": metrics, "append": append})
+            for brand_name, data, metrics in brands
+        ])
+        results = await asyncio.gather(
+            *(self.refresh_brand_async(brand_name, **kwargs) for _, brand_name, kwargs in jobs),
+            return_exceptions=True
+        )
+        for (_, brand_name, _), result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Refreshing sheets for {brand_name} failed: {str(result)}", exc_info=result)
+    
+    def _do_refresh_brand(self, brand_name: str, data: List[Dict[str, Any]], metrics: Dict[str, Any], append: bool = False) -> None:
+        """
+        Write the data, metrics and dashboard sheets for a brand with a single batch_update call.
+        
+        Worksheets that do not exist yet are added within the same request. Only
+        when there are more than _DATA_SHEET_CHUNK_SIZE rows of data do the
+        remaining rows follow in further calls. Errors propagate to the queue
+        worker or refresh_brands_async, which log them once.
         
         Args:
             brand_name (str): Name of the brand
             data (List[Dict[str, Any]]): Social media data
+            metrics (Dict[str, Any]): Processed metrics and insights
+            append (bool): Append only posts not yet on the data sheet instead of replacing its contents
         """
+        spreadsheet = self.create_or_get_spreadsheet(brand_name)
+        
+        # One metadata call covers all three worksheets
+        existing = {sheet.title: sheet for sheet in _call_api(spreadsheet.worksheets)}
+        next_sheet_id = max((sheet.id for sheet in existing.values()), default=0) + 1
+        
+        add_requests = []
+        sheets = {}
+        for title in ("Raw Data", "Metrics", "Dashboard"):
+            if title in existing:
+                sheets[title] = existing[title]
+                continue
+            add_requests.append({
+                "addSheet": {
+                    "properties": {
+                        "sheetId": next_sheet_id,
+                        "title": title,
+                        "gridProperties": {"rowCount": 1, "columnCount": 1}
+                    }
+                }
+            })
+            sheets[title] = _SheetGrid(next_sheet_id, 1, 1)
+            next_sheet_id += 1
+        
+        posts, append = self._pending_posts(brand_name, existing.get("Raw Data"), data, append)
+        data_batches = self._data_sheet_batches(sheets["Raw Data"], posts, append)
+        groups = {
+            "new worksheets": add_requests,
+            "Raw Data": data_batches[0] if data_batches else [],
+            "Metrics": self._metrics_sheet_requests(sheets["Metrics"], brand_name, metrics),
+            "Dashboard": self._dashboard_sheet_requests(sheets["Dashboard"], brand_name, spreadsheet.id)
+        }
+        
         try:
-            spreadsheet = self.create_or_get_spreadsheet(brand_name)
-            
-            # Convert data to DataFrame for easier manipulation
-            df = pd.DataFrame(data)
-            
-            # Prepare data for sheets
-            headers = ["Date", "Platform", "Content", "Likes", "Comments", "Shares", "Sentiment", "URL"]
-            rows = [headers]
-            
-            for _, row in df.iterrows():
-                rows.append([
-                    row["date"],
-                    row["platform"],
-                    row["content"],
-                    row["engagement"]["likes"],
-                    row["engagement"]["comments"],
-                    row["engagement"]["shares"],
-                    row["sentiment"],
-                    row["url"]
-                ])
-            
-            # Update or create the data sheet
-            try:
-                sheet = spreadsheet.worksheet("Raw Data")
-            except gspread.WorksheetNotFound:
-                sheet = spreadsheet.add_worksheet("Raw Data", len(rows), len(headers))
-            
-            sheet.clear()  # Clear existing data
-            sheet.update(rows)
-            
-            # Format the sheet
-            sheet.format("A1:H1", {"textFormat": {"bold": True}})
-            sheet.freeze(rows=1)
+            _batch_update(spreadsheet, [request for group in groups.values() for request in group])
+        except APIError as e:
+            # A batch is applied all or nothing, so keep one rejected request from dropping every sheet
+            if e.response.status_code != 400:
+                raise
+            logger.warning(f"Combined sheet update for {brand_name} was rejected, sending each sheet separately")
+            for title, group in groups.items():
+                if not group:
+                    continue
+                try:
+                    _batch_update(spreadsheet, group)
+                except APIError:
+                    # The data sheet's later batches depend on the first one
+                    if title in ("new worksheets", "Raw Data"):
+                        raise
+                    logger.exception(f"Error updating the {title} sheet for {brand_name}")
+        
+        # Data beyond the first chunk follows in further batches to bound the request size
+        for batch in data_batches[1:]:
+            _batch_update(spreadsheet, batch)
+        
+        if posts:
+            self._mark_uploaded(brand_name, posts, append)
+        
+        logger.info(f"Refreshed all sheets for {brand_name}")
+    
+    def _pending_posts(self, brand_name: str, sheet: gspread.Worksheet, data: List[Dict[str, Any]], append: bool) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Work out which posts still need to be uploaded to the data sheet.
+        
+        When appending, the posts already on the sheet are read from it once
+        per brand, so the history survives restarts of the service.
+        
+        Args:
+            brand_name (str): Name of the brand
+            sheet (gspread.Worksheet): The data worksheet, or None if it is being added
+            data (List[Dict[str, Any]]): Social media data
+            append (bool): Whether new posts should be appended to the existing rows
             
-            logger.info(f"Updated data sheet for {brand_name}")
+        Returns:
+            Tuple[List[Dict[str, Any]], bool]: Posts to upload, and whether they are appended
+        """
+        if not append or sheet is None:
+            return data, False
+        
+        uploaded = self._uploaded_posts.get(brand_name)
+        if uploaded is None:
+            uploaded = self._read_uploaded_keys(sheet)
+            if uploaded is None:
+                # Nothing on the sheet yet, not even the header row
+                return data, False
+            self._uploaded_posts[brand_name] = uploaded
+        return [d for d in data if (d["date"], d["url"]) not in uploaded], True
+    
+    def _read_uploaded_keys(self, sheet: gspread.Worksheet) -> Set[Tuple[str, str]]:
+        """
+        Read the (date, URL) key of every post already on the data sheet.
+        
+        Args:
+            sheet (gspread.Worksheet): The data worksheet
             
-        except Exception as e:
-            logger.error(f"Error updating data sheet: {str(e)}")
-            raise
+        Returns:
+            Set[Tuple[str, str]]: Keys of the posts on the sheet, or None if the sheet is empty
+        """
+        dates, urls = _call_api(sheet.batch_get, ["A:A", "H:H"])
+        if not dates:
+            return None
+        
+        # Skip the header row; blank cells come back as empty lists
+        return {(date[0], url[0]) for date, url in zip(dates[1:], urls[1:]) if date and url}
     
-    def update_metrics_sheet(self, brand_name: str, metrics: Dict[str, Any]) -> None:
+    def _mark_uploaded(self, brand_name: str, posts: List[Dict[str, Any]], append: bool) -> None:
         """
-        Update the metrics sheet with processed data and insights.
+        Record posts that are now on the data sheet.
         
         Args:
             brand_name (str): Name of the brand
-            metrics (Dict[str, Any]): Processed metrics and insights
+            posts (List[Dict[str, Any]]): Posts that were uploaded
+            append (bool): Whether they were appended to the existing rows
         """
-        try:
-            spreadsheet = self.create_or_get_spreadsheet(brand_name)
-            
-            # Log the incoming metrics for debugging
-            logger.debug(f"Received metrics for {brand_name}: {json.dumps(metrics, indent=2)}")
+        uploaded = self._uploaded_posts.get(brand_name) if append else None
+        if uploaded is None:
+            uploaded = set()
+        uploaded.update((d["date"], d["url"]) for d in posts)
+        self._uploaded_posts[brand_name] = uploaded
+    
+    def _data_sheet_batches(self, sheet: gspread.Worksheet, posts: List[Dict[str, Any]], append: bool, chunk_size: int = _DATA_SHEET_CHUNK_SIZE) -> List[List[Dict[str, Any]]]:
+        """
+        Build the batch_update requests that write posts to the data sheet, split into batches.
+        
+        Each batch carries at most chunk_size rows, which bounds the size of a
+        single request. When replacing the sheet, the first batch also clears,
+        resizes and formats it.
+        
+        Args:
+            sheet (gspread.Worksheet): The data worksheet
+            posts (List[Dict[str, Any]]): Posts to write
+            append (bool): Append after the existing rows instead of replacing them
+            chunk_size (int): Maximum number of rows per batch
             
-            # Ensure required metrics exist with default values
-            metrics = {
-                "total_posts": metrics.get("total_posts", 0),
-                "total_engagement": metrics.get("total_engagement", 0),
-                "platform_stats": metrics.get("platform_stats", {}),
-                "sentiment_stats": metrics.get("sentiment_stats", {}),
-                "raw_data": metrics.get("raw_data", []),
-                "insights": metrics.get("insights", [])
+        Returns:
+            List[List[Dict[str, Any]]]: batch_update requests, one list per batch
+        """
+        rows = _data_rows(posts)
+        if append:
+            return [
+                [{"appendCells": {"sheetId": sheet.id, "rows": _row_data(rows[start:start + chunk_size], raw=True), "fields": "userEnteredValue"}}]
+                for start in range(0, len(rows), chunk_size)
+            ]
+        
+        rows = [_DATA_HEADERS] + rows
+        batches = [
+            [_update_cells_request(sheet.id, rows[start:start + chunk_size], start=f"A{start + 1}", raw=True)]
+            for start in range(0, len(rows), chunk_size)
+        ]
+        
+        # Clear and grow the sheet before the first rows, then bold and freeze the header
+        batches[0][:0] = [_clear_values_request(sheet.id)] + _resize_requests(sheet, len(rows), len(_DATA_HEADERS))
+        batches[0].append(_repeat_cell_request(sheet.id, "A1:H1", {"textFormat": {"bold": True}}))
+        batches[0].append({
+            "updateSheetProperties": {
+                "properties": {"sheetId": sheet.id, "gridProperties": {"frozenRowCount": 1}},
+                "fields": "gridProperties.frozenRowCount"
             }
+        })
+        return batches
+    
+    def _metrics_sheet_requests(self, sheet: gspread.Worksheet, brand_name: str, metrics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Build the batch_update requests that write and format the metrics sheet.
+        
+        Args:
+            sheet (gspread.Worksheet): The metrics worksheet
+            brand_name (str): Name of the brand
+            metrics (Dict[str, Any]): Processed metrics and insights
             
-            # Validate insights
-            if not isinstance(metrics["insights"], list):
-                logger.warning(f"Insights is not a list: {metrics['insights']}")
-                metrics["insights"] = []
-            
-            # Log the processed metrics
+        Returns:
+            List[Dict[str, Any]]: batch_update requests
+        """
+        # Log the incoming metrics for debugging (skip the serialization unless DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Received metrics for {brand_name}: {json.dumps(metrics, indent=2)}")
+        
+        # Accept the processor's {"metrics", "insights"} result as well as bare metrics
+        processed = metrics.get("metrics", metrics)
+        
+        # Ensure required metrics exist with default values
+        metrics = {
+            "total_posts": processed.get("total_posts", 0),
+            "total_engagement": processed.get("total_engagement", 0),
+            "platform_stats": processed.get("platform_stats", {}),
+            "sentiment_stats": processed.get("sentiment_stats", {}),
+            "insights": metrics.get("insights", [])
+        }
+        
+        # Validate insights
+        if not isinstance(metrics["insights"], list):
+            logger.warning(f"Insights is not a list: {metrics['insights']}")
+            metrics["insights"] = []
+        
+        # Log the processed metrics
+        if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Processed metrics for {brand_name}: {json.dumps(metrics, indent=2)}")
-            
-            # Prepare metrics data
-            metrics_data = [
-                ["Metrics", "Value"],
-                ["Total Posts", metrics["total_posts"]],
-                ["Total Engagement", metrics["total_engagement"]],
-                ["Average Engagement Rate", f"{metrics['total_engagement'] / metrics['total_posts']:.2f}" if metrics['total_posts'] > 0 else "0"],
-                ["", ""],
-                ["Platform Statistics", ""],
-                ["Platform", "Total Engagement", "Posts", "Avg. Engagement"]
-            ]
-            
-            # Add platform statistics
-            for platform, engagement in metrics["platform_stats"].items():
-                platform_posts = sum(1 for post in metrics.get("raw_data", []) if post["platform"] == platform)
-                avg_engagement = engagement / platform_posts if platform_posts > 0 else 0
-                metrics_data.append([platform, engagement, platform_posts, f"{avg_engagement:.2f}"])
-            
-            metrics_data.extend([
-                ["", ""],
-                ["Sentiment Distribution", ""],
-                ["Sentiment", "Count", "Percentage"]
-            ])
-            
-            # Add sentiment statistics
-            total_posts = metrics["total_posts"]
-            for sentiment, count in metrics["sentiment_stats"].items():
-                percentage = (count / total_posts) * 100 if total_posts > 0 else 0
-                metrics_data.append([sentiment, count, f"{percentage:.1f}%"])
-            
-            metrics_data.extend([
-                ["", ""],
-                ["AI-Generated Insights", ""]
-            ])
-            
-            # Add insights with validation
-            if metrics["insights"]:
-                for insight in metrics["insights"]:
-                    if isinstance(insight, str):
-                        metrics_data.append([insight, ""])
-                    else:
-                        logger.warning(f"Invalid insight format: {insight}")
-                        metrics_data.append([str(insight), ""])
-            else:
-                logger.warning("No insights available")
-                metrics_data.append(["No insights available", ""])
-            
-            # Log the final metrics data
-            logger.debug(f"Final metrics data for {brand_name}: {json.dumps(metrics_data, indent=2)}")
-            
-            # Update or create the metrics sheet
-            try:
-                sheet = spreadsheet.worksheet("Metrics")
-            except gspread.WorksheetNotFound:
-                sheet = spreadsheet.add_worksheet("Metrics", len(metrics_data), 3)
-            
-            sheet.clear()  # Clear existing data
-            sheet.update(metrics_data)
-            
-            # Format the sheet
-            sheet.format("A1:B1", {"textFormat": {"bold": True}})
-            sheet.format("A6:C6", {"textFormat": {"bold": True}})
-            sheet.format("A12:C12", {"textFormat": {"bold": True}})
-            sheet.format("A16:B16", {"textFormat": {"bold": True}})
-            
-            # Format sentiment percentages with background colors
-            sentiment_start_row = 13
-            for i, (sentiment, count) in enumerate(metrics["sentiment_stats"].items()):
-                row = sentiment_start_row + i
-                percentage = (count / total_posts) * 100 if total_posts > 0 else 0
-                
-                # Set background color based on percentage
-                if percentage > 50:
-                    color = {"red": 0.8, "green": 1, "blue": 0.8}  # Light green
-                elif percentage > 25:
-                    color = {"red": 1, "green": 1, "blue": 0.8}  # Light yellow
+        
+        # Prepare metrics data
+        metrics_data = [
+            ["Metrics", "Value"],
+            ["Total Posts", metrics["total_posts"]],
+            ["Total Engagement", metrics["total_engagement"]],
+            ["Average Engagement Rate", _format_decimal(metrics['total_engagement'] / metrics['total_posts']) if metrics['total_posts'] > 0 else "0"],
+            ["", ""],
+            ["Platform Statistics", ""],
+            ["Platform", "Total Engagement", "Posts", "Avg. Engagement"]
+        ]
+        
+        # Add platform statistics (post counts were already tallied in one pass by the processor)
+        for platform, stats in metrics["platform_stats"].items():
+            metrics_data.append([platform, stats["total_engagement"], stats["posts"], _format_decimal(stats["avg_engagement"])])
+        
+        metrics_data.extend([
+            ["", ""],
+            ["Sentiment Distribution", ""],
+            ["Sentiment", "Count", "Percentage"]
+        ])
+        
+        # Section rows move with the number of platforms, so note where they land
+        sentiment_title_row = len(metrics_data) - 1
+        first_sentiment_index = len(metrics_data)
+        
+        # Add sentiment statistics, picking each row's background color in the same pass
+        color_rows = []
+        for sentiment, stats in metrics["sentiment_stats"].items():
+            percentage = stats["percentage"]
+            metrics_data.append([sentiment, stats["count"], _format_percentage(percentage)])
+            color_rows.append(_sentiment_color_row(percentage))
+        
+        metrics_data.extend([
+            ["", ""],
+            ["AI-Generated Insights", ""]
+        ])
+        insights_title_row = len(metrics_data)
+        
+        # Add insights with validation
+        if metrics["insights"]:
+            for insight in metrics["insights"]:
+                if isinstance(insight, str):
+                    metrics_data.append([insight, ""])
                 else:
-                    color = {"red": 1, "green": 0.8, "blue": 0.8}  # Light red
-                
-                sheet.format(f"C{row}", {"backgroundColor": color})
-            
-            logger.info(f"Updated metrics sheet for {brand_name}")
-            
-        except Exception as e:
-            logger.error(f"Error updating metrics sheet: {str(e)}")
-            raise
+                    logger.warning(f"Invalid insight format: {insight}")
+                    metrics_data.append([str(insight), ""])
+        else:
+            logger.warning("No insights available")
+            metrics_data.append(["No insights available", ""])
+        
+        # Log the final metrics data
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Final metrics data for {brand_name}: {json.dumps(metrics_data, indent=2)}")
+        
+        # Clear and write the sheet
+        num_cols = max(len(row) for row in metrics_data)
+        requests = [_clear_values_request(sheet.id)]
+        requests.extend(_resize_requests(sheet, len(metrics_data), num_cols))
+        requests.append(_update_cells_request(sheet.id, metrics_data))
+        
+        # Format the sheet: the header row and the title row of each section
+        bold_ranges = ("A1:B1", "A6:C6", f"A{sentiment_title_row}:C{sentiment_title_row}", f"A{insights_title_row}:B{insights_title_row}")
+        for a1_range in bold_ranges:
+            requests.append(_repeat_cell_request(sheet.id, a1_range, {"textFormat": {"bold": True}}))
+        
+        # Format sentiment percentages with background colors; the rows are contiguous,
+        # so one updateCells request colors them all
+        if color_rows:
+            requests.append({
+                "updateCells": {
+                    "start": {"sheetId": sheet.id, "rowIndex": first_sentiment_index, "columnIndex": 2},
+                    "rows": color_rows,
+                    "fields": "userEnteredFormat.backgroundColor"
+                }
+            })
+        
+        return requests
     
-    def create_dashboard_sheet(self, brand_name: str) -> None:
+    def _dashboard_sheet_requests(self, dashboard: gspread.Worksheet, brand_name: str, spreadsheet_id: str) -> List[Dict[str, Any]]:
         """
-        Create a dashboard sheet with charts and visualizations.
+        Build the batch_update requests that write and format the dashboard sheet.
         
         Args:
+            dashboard (gspread.Worksheet): The dashboard worksheet
             brand_name (str): Name of the brand
-        """
-        try:
-            spreadsheet = self.create_or_get_spreadsheet(brand_name)
-            
-            # Create dashboard sheet
-            try:
-                dashboard = spreadsheet.worksheet("Dashboard")
-            except gspread.WorksheetNotFound:
-                dashboard = spreadsheet.add_worksheet("Dashboard", 100, 20)
-            
-            # Add dashboard title and description
-            dashboard.update("A1", [[f"Social Media Dashboard - {brand_name}"]])
-            dashboard.update("A2", [[f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]])
-            
-            # Add chart placeholders
-            dashboard.update("A4", [["Platform Performance"]])
-            dashboard.update("A20", [["Sentiment Distribution"]])
-            dashboard.update("A36", [["Engagement Trends"]])
-            
-            # Format the dashboard
-            dashboard.format("A1", {"textFormat": {"bold": True, "fontSize": 16}})
-            dashboard.format("A2", {"textFormat": {"italic": True}})
-            dashboard.format("A4", {"textFormat": {"bold": True, "fontSize": 14}})
-            dashboard.format("A20", {"textFormat": {"bold": True, "fontSize": 14}})
-            dashboard.format("A36", {"textFormat": {"bold": True, "fontSize": 14}})
+            spreadsheet_id (str): ID of the spreadsheet, used for the Data Studio link
             
-            # Add instructions for Data Studio
-            dashboard.update("A50", [[
-                "To view interactive visualizations, click the link below to open in Google Data Studio:"
-            ]])
-            
-            # Create Data Studio link
-            data_studio_url = f"https://datastudio.google.com/reporting/create?ds=spreadsheets&spreadsheetId={spreadsheet.id}"
-            dashboard.update("A51", [[f"=HYPERLINK(\"{data_studio_url}\", \"Open in Google Data Studio\")"]])
-            
-            logger.info(f"Created dashboard sheet for {brand_name}")
-            
-        except Exception as e:
-            logger.error(f"Error creating dashboard sheet: {str(e)}")
-            raise 
\ No newline at end of file
+        Returns:
+            List[Dict[str, Any]]: batch_update requests
+        """
+        data_studio_url = f"https://datastudio.google.com/reporting/create?ds=spreadsheets&spreadsheetId={spreadsheet_id}"
+        
+        cells = {
+            # Dashboard title and description
+            "A1": f"Social Media Dashboard - {brand_name}",
+            "A2": f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            # Chart placeholders
+            "A4": "Platform Performance",
+            "A20": "Sentiment Distribution",
+            "A36": "Engagement Trends",
+            # Instructions and link for Data Studio
+            "A50": "To view interactive visualizations, click the link below to open in Google Data Studio:",
+            "A51": f"=HYPERLINK(\"{data_studio_url}\", \"Open in Google Data Studio\")"
+        }
+        formats = {
+            "A1": {"textFormat": {"bold": True, "fontSize": 16}},
+            "A2": {"textFormat": {"italic": True}},
+            "A4": {"textFormat": {"bold": True, "fontSize": 14}},
+            "A20": {"textFormat": {"bold": True, "fontSize": 14}},
+            "A36": {"textFormat": {"bold": True, "fontSize": 14}}
+        }
+        
+        # Each cell's value and format go in the same updateCells request
+        requests = _resize_requests(dashboard, 100, 20)
+        for cell, value in cells.items():
+            row, col = a1_to_rowcol(cell)
+            cell_format = formats.get(cell)
+            requests.append({
+                "updateCells": {
+                    "start": {"sheetId": dashboard.id, "rowIndex": row - 1, "columnIndex": col - 1},
+                    "rows": [{"values": [_cell_data(value, cell_format)]}],
+                    "fields": "userEnteredValue,userEnteredFormat.textFormat" if cell_format else "userEnteredValue"
+                }
+            })
+        return requests 
\ No newline at end of file
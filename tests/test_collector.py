@@ -0,0 +1,52 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import orjson
+
+from app.data.collector import SocialMediaDataCollector
+
+
+class LoadDataTest(unittest.TestCase):
+    def setUp(self):
+        cwd = os.getcwd()
+        tmp = tempfile.TemporaryDirectory()
+        os.chdir(tmp.name)
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        Path("data").mkdir()
+
+    def _load(self, posts):
+        Path("data", "acme_data.json").write_bytes(orjson.dumps(posts))
+        return asyncio.run(SocialMediaDataCollector().load_data_from_json("acme_data.json"))
+
+    def test_legacy_engagement_is_flattened(self):
+        legacy = {
+            "platform": "X",
+            "date": "2024-01-01 10:00:00",
+            "engagement": {"likes": 10, "comments": 2, "shares": 1},
+            "sentiment": "positive"
+        }
+
+        self.assertEqual(self._load([legacy]), [{
+            "platform": "X",
+            "date": "2024-01-01 10:00:00",
+            "sentiment": "positive",
+            "likes": 10,
+            "comments": 2,
+            "shares": 1
+        }])
+
+    def test_flat_posts_are_unchanged(self):
+        post = {"platform": "X", "date": "2024-01-01 10:00:00", "likes": 10, "comments": 2, "shares": 1}
+
+        self.assertEqual(self._load([post]), [post])
+
+    def test_missing_file_loads_as_empty(self):
+        self.assertEqual(asyncio.run(SocialMediaDataCollector().load_data_from_json("missing.json")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
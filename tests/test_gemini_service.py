@@ -0,0 +1,91 @@
+import unittest
+from types import SimpleNamespace
+
+from app.services.gemini_service import GeminiService
+
+
+class FakeModel:
+    """Stands in for the Gemini model, replying with fixed text and counting calls."""
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def generate_content(self, contents, safety_settings, generation_config):
+        self.calls.append(generation_config)
+        return SimpleNamespace(text=self.text)
+
+
+def _service(model=None) -> GeminiService:
+    """Build a service without configuring the Gemini client."""
+    service = GeminiService.__new__(GeminiService)
+    service.model = model
+    return service
+
+
+def _brand(name: str) -> tuple:
+    metrics = {
+        "total_posts": 2,
+        "total_engagement": 20,
+        "platform_stats": {"X": {"total_engagement": 20, "posts": 2, "avg_engagement": 10.0}},
+        "sentiment_stats": {"positive": {"count": 2, "percentage": 100.0}}
+    }
+    return (name, [], metrics)
+
+
+class ParseInsightsTest(unittest.TestCase):
+    def test_strips_numbering_and_normalizes_each_insight(self):
+        text = "1. engagement is highest on X\n- Reply to negative comments faster\n* post more video content."
+
+        self.assertEqual(_service()._parse_insights(text), [
+            "• Engagement is highest on X.",
+            "• Reply to negative comments faster.",
+            "• Post more video content."
+        ])
+
+    def test_skips_blank_and_short_lines(self):
+        text = "\n  \n1. Hi\nInsights:\nFocus on Instagram Reels this quarter"
+
+        self.assertEqual(_service()._parse_insights(text), ["• Focus on Instagram Reels this quarter."])
+
+    def test_keeps_at_most_five_insights(self):
+        text = "\n".join(f"Insight number {i} about the brand" for i in range(8))
+
+        self.assertEqual(len(_service()._parse_insights(text)), 5)
+
+
+class BatchInsightsTest(unittest.TestCase):
+    def test_parses_fenced_json_per_brand(self):
+        model = FakeModel('```json\n{"Acme": ["grow reach on X"], "Beta": "answer customer questions faster"}\n```')
+
+        insights = _service(model).generate_insights_batch([_brand("Acme"), _brand("Beta"), _brand("Gamma")])
+
+        self.assertEqual(insights, {
+            "Acme": ["• Grow reach on X."],
+            "Beta": ["• Answer customer questions faster."],
+            "Gamma": []
+        })
+
+    def test_output_budget_grows_with_the_number_of_brands(self):
+        model = FakeModel("{}")
+
+        _service(model).generate_insights_batch([_brand(f"Brand {i}") for i in range(6)])
+
+        self.assertEqual(model.calls[0]["max_output_tokens"], 6 * 512)
+
+    def test_large_batches_are_split(self):
+        model = FakeModel("{}")
+
+        _service(model).generate_insights_batch([_brand(f"Brand {i}") for i in range(20)])
+
+        self.assertEqual(len(model.calls), 2)
+
+    def test_unparseable_reply_is_not_retried(self):
+        model = FakeModel('{"Acme": ["cut off')
+
+        with self.assertRaises(ValueError):
+            _service(model).generate_insights_batch([_brand("Acme")])
+        self.assertEqual(len(model.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
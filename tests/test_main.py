@@ -0,0 +1,150 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import orjson
+from fastapi import BackgroundTasks, HTTPException
+
+# The services need Google and Gemini credentials, so stand them in while the app is built
+with mock.patch("app.services.sheets_service.GoogleSheetsService"), mock.patch("app.services.gemini_service.GeminiService"):
+    from app import main
+
+
+def _post(date: str, platform: str = "X") -> dict:
+    return {
+        "platform": platform,
+        "date": date,
+        "content": "Sample post about Acme",
+        "likes": 10,
+        "comments": 2,
+        "shares": 1,
+        "sentiment": "positive",
+        "url": f"https://example.com/acme/{date}"
+    }
+
+
+class ApiTestCase(unittest.TestCase):
+    """Runs each test in an empty working directory with fresh service stand-ins."""
+    def setUp(self):
+        cwd = os.getcwd()
+        tmp = tempfile.TemporaryDirectory()
+        os.chdir(tmp.name)
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+
+        for name in ("sheets_service", "gemini_service"):
+            patcher = mock.patch.object(main, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def collect(self, posts_by_brand: dict):
+        """Make data collection return fixed posts per brand."""
+        patcher = mock.patch.object(
+            main.data_collector, "collect_data",
+            new=mock.AsyncMock(side_effect=lambda brand_name: posts_by_brand.get(brand_name, []))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class RawDataTest(ApiTestCase):
+    def test_returns_the_posts_saved_by_the_last_search(self):
+        posts = [_post("2024-01-01 10:00:00"), _post("2024-01-02 10:00:00")]
+        collector = main.data_collector
+        asyncio.run(collector.save_data_to_json(posts, collector.data_filename("Acme Corp")))
+
+        response = asyncio.run(main.get_raw_data("Acme Corp"))
+
+        self.assertEqual(orjson.loads(response.body), posts)
+
+    def test_brand_without_saved_data_is_not_found(self):
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(main.get_raw_data("Unknown"))
+        self.assertEqual(raised.exception.status_code, 404)
+
+
+class SearchBrandsBatchTest(ApiTestCase):
+    def test_insights_for_every_brand_come_from_one_call(self):
+        self.collect({"Acme": [_post("2024-01-01 10:00:00")], "Beta": [_post("2024-01-01 10:00:00", "Instagram")]})
+        self.gemini_service.generate_insights_batch.return_value = {"Acme": ["• Post more on X."], "Beta": []}
+
+        response = asyncio.run(main.search_brands_batch(BackgroundTasks(), ["Acme", "Beta", "Gamma"]))
+        results = orjson.loads(response.body)
+
+        self.gemini_service.generate_insights_batch.assert_called_once()
+        batch = self.gemini_service.generate_insights_batch.call_args.args[0]
+        self.assertEqual([brand_name for brand_name, _, _ in batch], ["Acme", "Beta"])
+        self.assertEqual(results["Acme"]["insights"], ["• Post more on X."])
+        self.assertEqual(results["Beta"]["insights"], ["No AI insights available at this time."])
+        self.assertEqual(results["Gamma"]["insights"], ["No data available for analysis."])
+
+    def test_sheets_are_refreshed_after_responding(self):
+        posts = [_post("2024-01-01 10:00:00")]
+        self.collect({"Acme": posts})
+        self.gemini_service.generate_insights_batch.return_value = {"Acme": ["• Post more on X."]}
+        background_tasks = BackgroundTasks()
+
+        response = asyncio.run(main.search_brands_batch(background_tasks, ["Acme"], append=True))
+
+        self.sheets_service.refresh_brands_async.assert_not_called()
+        [task] = background_tasks.tasks
+        self.assertIs(task.func, self.sheets_service.refresh_brands_async)
+        self.assertEqual(task.args, ([("Acme", posts, orjson.loads(response.body)["Acme"])], True))
+
+    def test_failed_batch_falls_back_for_each_brand(self):
+        self.collect({"Acme": [_post("2024-01-01 10:00:00")]})
+        self.gemini_service.generate_insights_batch.side_effect = RuntimeError("quota exceeded")
+
+        response = asyncio.run(main.search_brands_batch(BackgroundTasks(), ["Acme"]))
+
+        self.assertEqual(orjson.loads(response.body)["Acme"]["insights"], ["Unable to generate AI insights at this time."])
+
+    def test_no_data_for_any_brand_is_not_found(self):
+        self.collect({})
+
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(main.search_brands_batch(BackgroundTasks(), ["Unknown"]))
+        self.assertEqual(raised.exception.status_code, 404)
+        self.gemini_service.generate_insights_batch.assert_not_called()
+
+
+class StreamBrandTest(ApiTestCase):
+    def _lines(self, brand_name: str) -> list:
+        async def read():
+            response = await main.stream_brand(brand_name)
+            return [orjson.loads(line) async for chunk in response.body_iterator for line in chunk.splitlines()]
+        return asyncio.run(read())
+
+    def test_metrics_then_posts_then_insights(self):
+        posts = [_post("2024-01-01 10:00:00"), _post("2024-01-02 10:00:00")]
+        self.collect({"Acme": posts})
+        self.gemini_service.generate_insights.return_value = ["• Post more on X."]
+
+        lines = self._lines("Acme")
+
+        self.assertEqual([line["type"] for line in lines], ["metrics", "post", "post", "insights"])
+        self.assertEqual(lines[0]["data"]["total_posts"], 2)
+        self.assertEqual([line["data"] for line in lines[1:3]], posts)
+        self.assertEqual(lines[3]["data"], ["• Post more on X."])
+        self.sheets_service.refresh_brand.assert_not_called()
+
+    def test_failed_insights_still_end_the_stream(self):
+        self.collect({"Acme": [_post("2024-01-01 10:00:00")]})
+        self.gemini_service.generate_insights.side_effect = RuntimeError("quota exceeded")
+
+        lines = self._lines("Acme")
+
+        self.assertEqual(lines[-1], {"type": "insights", "data": ["Unable to generate AI insights at this time."]})
+
+    def test_brand_without_data_is_not_found(self):
+        self.collect({})
+
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(main.stream_brand("Unknown"))
+        self.assertEqual(raised.exception.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from app.data.processor import SocialMediaDataProcessor
+
+
+def _post(date: str, platform: str, sentiment: str, likes: int) -> dict:
+    return {
+        "platform": platform,
+        "date": date,
+        "content": "Sample post",
+        "likes": likes,
+        "comments": 2,
+        "shares": 3,
+        "sentiment": sentiment,
+        "url": "https://example.com/acme/1"
+    }
+
+
+class ProcessDataTest(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            _post("2024-01-02 09:00:00", "X", "positive", 5),
+            _post("2024-01-01 09:00:00", "X", "negative", 15),
+            _post("2024-01-01 18:00:00", "Instagram", "positive", 35)
+        ]
+
+    def test_totals_and_platform_stats(self):
+        metrics = SocialMediaDataProcessor().process_data(self.data)["metrics"]
+
+        self.assertEqual(metrics["total_posts"], 3)
+        self.assertEqual(metrics["total_engagement"], 70)
+        self.assertEqual(metrics["platform_stats"], {
+            "X": {"total_engagement": 30, "posts": 2, "avg_engagement": 15.0},
+            "Instagram": {"total_engagement": 40, "posts": 1, "avg_engagement": 40.0}
+        })
+
+    def test_sentiment_counts_and_percentages(self):
+        metrics = SocialMediaDataProcessor().process_data(self.data)["metrics"]
+
+        self.assertEqual(metrics["sentiment_stats"]["positive"]["count"], 2)
+        self.assertAlmostEqual(metrics["sentiment_stats"]["positive"]["percentage"], 200 / 3)
+        self.assertEqual(metrics["sentiment_stats"]["negative"]["count"], 1)
+
+    def test_daily_engagement_is_summed_per_day_in_date_order(self):
+        metrics = SocialMediaDataProcessor().process_data(self.data)["metrics"]
+
+        self.assertEqual(list(metrics["daily_engagement"].items()), [("2024-01-01", 60), ("2024-01-02", 10)])
+
+    def test_earlier_results_are_not_mutated(self):
+        processor = SocialMediaDataProcessor()
+        first = processor.process_data(self.data)
+        processor.process_data(self.data[:1])
+
+        self.assertEqual(first["metrics"]["total_posts"], 3)
+
+    def test_empty_data(self):
+        results = SocialMediaDataProcessor().process_data([])
+
+        self.assertEqual(results["metrics"]["total_posts"], 0)
+        self.assertEqual(results["insights"], ["No data available for analysis."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,290 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from gspread.exceptions import APIError
+
+from app.services.sheets_service import GoogleSheetsService, _TokenBucket, _is_rate_limited, _is_retryable, _retry_wait
+
+
+def _service() -> GoogleSheetsService:
+    """Build a service without credentials or a worker thread."""
+    service = GoogleSheetsService.__new__(GoogleSheetsService)
+    service._uploaded_posts = {}
+    return service
+
+
+def _api_error(status_code: int, headers: dict = None) -> APIError:
+    response = SimpleNamespace(
+        status_code=status_code,
+        headers=headers or {},
+        text="error",
+        json=lambda: {"error": {"code": status_code, "message": "error"}}
+    )
+    return APIError(response)
+
+
+def _post(date: str, url: str) -> dict:
+    return {
+        "date": date,
+        "platform": "X",
+        "content": "Sample post",
+        "likes": 1,
+        "comments": 2,
+        "shares": 3,
+        "sentiment": "positive",
+        "url": url
+    }
+
+
+class FakeDataSheet:
+    """Stands in for the Raw Data worksheet, returning fixed Date and URL columns."""
+    def __init__(self, dates, urls):
+        self.columns = [dates, urls]
+        self.reads = 0
+
+    def batch_get(self, ranges):
+        self.reads += 1
+        return self.columns
+
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep; sleeping advances the clock."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class CoalesceTest(unittest.TestCase):
+    def test_replacing_upload_supersedes_earlier_jobs(self):
+        jobs = [
+            ("refresh_brand", "Acme", {"data": [1], "metrics": {"m": 1}, "append": False}),
+            ("refresh_brand", "Acme", {"data": [2], "metrics": {"m": 2}, "append": False})
+        ]
+        self.assertEqual(
+            GoogleSheetsService._coalesce(jobs),
+            [("refresh_brand", "Acme", {"data": [2], "metrics": {"m": 2}, "append": False})]
+        )
+
+    def test_appending_uploads_are_merged_without_duplicates(self):
+        jobs = [
+            ("refresh_brand", "Acme", {"data": [_post("d1", "u1")], "metrics": {"m": 1}, "append": True}),
+            ("refresh_brand", "Acme", {"data": [_post("d1", "u1"), _post("d2", "u2")], "metrics": {"m": 2}, "append": True})
+        ]
+        self.assertEqual(
+            GoogleSheetsService._coalesce(jobs),
+            [("refresh_brand", "Acme", {"data": [_post("d1", "u1"), _post("d2", "u2")], "metrics": {"m": 2}, "append": True})]
+        )
+
+    def test_appending_upload_supersedes_pending_replace(self):
+        jobs = [
+            ("refresh_brand", "Acme", {"data": [_post("d1", "u1")], "metrics": {"m": 1}, "append": False}),
+            ("refresh_brand", "Acme", {"data": [_post("d1", "u1")], "metrics": {"m": 2}, "append": True})
+        ]
+        self.assertEqual(
+            GoogleSheetsService._coalesce(jobs),
+            [("refresh_brand", "Acme", {"data": [_post("d1", "u1")], "metrics": {"m": 2}, "append": True})]
+        )
+
+    def test_jobs_stay_separate_per_brand_in_arrival_order(self):
+        jobs = [
+            ("refresh_brand", "Acme", {"data": [1], "metrics": {"m": 1}, "append": False}),
+            ("refresh_brand", "Beta", {"data": [2], "metrics": {"m": 2}, "append": False}),
+            ("refresh_brand", "Acme", {"data": [3], "metrics": {"m": 3}, "append": False})
+        ]
+        self.assertEqual(
+            GoogleSheetsService._coalesce(jobs),
+            [
+                ("refresh_brand", "Acme", {"data": [3], "metrics": {"m": 3}, "append": False}),
+                ("refresh_brand", "Beta", {"data": [2], "metrics": {"m": 2}, "append": False})
+            ]
+        )
+
+
+class PendingPostsTest(unittest.TestCase):
+    def test_replace_uploads_every_post(self):
+        data = [_post("d1", "u1")]
+        self.assertEqual(_service()._pending_posts("Acme", FakeDataSheet([], []), data, False), (data, False))
+
+    def test_new_sheet_is_written_from_scratch(self):
+        data = [_post("d1", "u1")]
+        self.assertEqual(_service()._pending_posts("Acme", None, data, True), (data, False))
+
+    def test_append_skips_posts_already_on_the_sheet(self):
+        service = _service()
+        sheet = FakeDataSheet([["Date"], ["d1"], ["d2"]], [["URL"], ["u1"], ["u2"]])
+
+        posts, append = service._pending_posts("Acme", sheet, [_post("d1", "u1"), _post("d3", "u3")], True)
+
+        self.assertTrue(append)
+        self.assertEqual(posts, [_post("d3", "u3")])
+        self.assertEqual(service._uploaded_posts["Acme"], {("d1", "u1"), ("d2", "u2")})
+
+    def test_sheet_is_read_once_per_brand(self):
+        service = _service()
+        sheet = FakeDataSheet([["Date"], ["d1"]], [["URL"], ["u1"]])
+
+        service._pending_posts("Acme", sheet, [_post("d1", "u1")], True)
+        service._mark_uploaded("Acme", [_post("d2", "u2")], True)
+        posts, _ = service._pending_posts("Acme", sheet, [_post("d1", "u1"), _post("d2", "u2")], True)
+
+        self.assertEqual(sheet.reads, 1)
+        self.assertEqual(posts, [])
+
+    def test_append_to_empty_sheet_writes_header_and_posts(self):
+        data = [_post("d1", "u1")]
+        self.assertEqual(_service()._pending_posts("Acme", FakeDataSheet([], []), data, True), (data, False))
+
+
+class MetricsSheetRequestsTest(unittest.TestCase):
+    def setUp(self):
+        self.sheet = SimpleNamespace(id=7, row_count=1, col_count=1)
+        self.metrics = {
+            "metrics": {
+                "total_posts": 4,
+                "total_engagement": 40,
+                "platform_stats": {
+                    platform: {"total_engagement": 10, "posts": 1, "avg_engagement": 10.0}
+                    for platform in ("Instagram", "Facebook", "X")
+                },
+                "sentiment_stats": {
+                    "positive": {"count": 3, "percentage": 75.0},
+                    "negative": {"count": 1, "percentage": 25.0},
+                    "neutral": {"count": 0, "percentage": 0.0}
+                }
+            },
+            "insights": ["• Post more on X."]
+        }
+
+    def _written_rows(self, requests):
+        write = next(r["updateCells"] for r in requests if "updateCells" in r and "start" in r["updateCells"])
+        return [[next(iter(cell["userEnteredValue"].values())) for cell in row["values"]] for row in write["rows"]]
+
+    def test_sections_follow_the_platform_rows(self):
+        rows = self._written_rows(_service()._metrics_sheet_requests(self.sheet, "Acme", self.metrics))
+
+        self.assertEqual(rows[5][0], "Platform Statistics")
+        self.assertEqual([row[0] for row in rows[7:10]], ["Instagram", "Facebook", "X"])
+        self.assertEqual(rows[11][0], "Sentiment Distribution")
+        self.assertEqual(rows[13], ["positive", 3, "75.0%"])
+        self.assertEqual(rows[17][0], "AI-Generated Insights")
+        self.assertEqual(rows[18][0], "• Post more on X.")
+
+    def test_formatting_targets_section_titles_and_sentiment_rows(self):
+        requests = _service()._metrics_sheet_requests(self.sheet, "Acme", self.metrics)
+
+        bold_rows = [r["repeatCell"]["range"]["startRowIndex"] for r in requests if "repeatCell" in r]
+        self.assertEqual(bold_rows, [0, 5, 11, 17])
+
+        colors = next(r["updateCells"] for r in requests if "updateCells" in r and r["updateCells"]["fields"] == "userEnteredFormat.backgroundColor")
+        self.assertEqual(colors["start"]["rowIndex"], 13)
+        self.assertEqual(colors["start"]["columnIndex"], 2)
+        self.assertEqual(len(colors["rows"]), 3)
+
+    def test_sheet_is_grown_to_fit(self):
+        requests = _service()._metrics_sheet_requests(self.sheet, "Acme", self.metrics)
+
+        growth = {r["appendDimension"]["dimension"]: r["appendDimension"]["length"] for r in requests if "appendDimension" in r}
+        self.assertEqual(growth, {"ROWS": 18, "COLUMNS": 3})
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_server_errors_are_retried_only_for_idempotent_calls(self):
+        self.assertTrue(_is_retryable(_api_error(503)))
+        self.assertFalse(_is_rate_limited(_api_error(503)))
+        self.assertTrue(_is_rate_limited(_api_error(429)))
+        self.assertFalse(_is_retryable(_api_error(400)))
+
+    def test_retry_after_header_sets_the_wait(self):
+        state = SimpleNamespace(
+            outcome=SimpleNamespace(exception=lambda: _api_error(429, {"Retry-After": "7"})),
+            attempt_number=1
+        )
+        self.assertEqual(_retry_wait(state), 7.0)
+
+    def test_retry_after_is_capped(self):
+        state = SimpleNamespace(
+            outcome=SimpleNamespace(exception=lambda: _api_error(429, {"Retry-After": "3600"})),
+            attempt_number=1
+        )
+        self.assertEqual(_retry_wait(state), 60)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("app.services.sheets_service.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_blocks_once_the_bucket_is_empty(self):
+        bucket = _TokenBucket(rate=2, per=1.0)
+
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+        bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [0.5])
+
+    def test_refills_with_elapsed_time(self):
+        bucket = _TokenBucket(rate=2, per=1.0)
+        bucket.acquire()
+        bucket.acquire()
+
+        self.clock.now += 1.0
+        bucket.acquire()
+        bucket.acquire()
+
+        self.assertEqual(self.clock.sleeps, [])
+
+
+class RefreshBrandsAsyncTest(unittest.TestCase):
+    def setUp(self):
+        self.service = _service()
+        self.calls = []
+        self.failures = {}
+        self.service._run_job = self._run_job
+
+    def _run_job(self, job, brand_name, kwargs):
+        self.calls.append((job, brand_name, kwargs))
+        if brand_name in self.failures:
+            raise self.failures[brand_name]
+
+    def test_brand_listed_twice_is_refreshed_once_with_the_latest_data(self):
+        asyncio.run(self.service.refresh_brands_async([
+            ("Acme", [_post("d1", "u1")], {"m": 1}),
+            ("Beta", [_post("d1", "u1")], {"m": 2}),
+            ("Acme", [_post("d2", "u2")], {"m": 3})
+        ]))
+
+        self.assertEqual(sorted(self.calls, key=lambda call: call[1]), [
+            ("refresh_brand", "Acme", {"data": [_post("d2", "u2")], "metrics": {"m": 3}, "append": False}),
+            ("refresh_brand", "Beta", {"data": [_post("d1", "u1")], "metrics": {"m": 2}, "append": False})
+        ])
+
+    def test_each_failure_is_logged_once_without_stopping_the_others(self):
+        self.failures = {"Beta": _api_error(500), "Gamma": RuntimeError("lock setup failed")}
+
+        with self.assertLogs("app.services.sheets_service", level="ERROR") as logs:
+            asyncio.run(self.service.refresh_brands_async([
+                ("Acme", [], {}), ("Beta", [], {}), ("Gamma", [], {})
+            ]))
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("Beta", logs.records[0].getMessage())
+        self.assertIn("Gamma", logs.records[1].getMessage())
+        self.assertIsNotNone(logs.records[0].exc_info)
+
+
+if __name__ == "__main__":
+    unittest.main()